@@ -8,17 +8,22 @@ and inserts into catalogue table
 import pandas as pd
 import argparse
 import psycopg
-from psycopg.rows import dict_row
+from psycopg import sql
 import logging
 import sys
 import re
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator
 from decimal import Decimal, InvalidOperation
-import traceback
 import json
+import csv
+import gzip
+import io
 import threading
-from queue import Queue
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from collections import deque
+from array import array
+from dataclasses import dataclass, asdict, field
 import os
 
 # Configure logging
@@ -32,527 +37,951 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# orjson is optional; it is a drop-in faster decoder for the JSON location arrays
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+# pyarrow is optional; when present the CSV is memory-mapped and parsed by its multithreaded reader
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:
+    pa = None
+
+# Only these CSV columns are read downstream
+CSV_COLUMNS = ['product_id', 'item_code', 'Store Inventory', 'Location']
+# CSV columns a file cannot be processed without
+REQUIRED_CSV_COLUMNS = ['product_id', 'item_code']
+# Rows parsed from the CSV at a time, rounded down to a multiple of the batch size
+CSV_CHUNK_SIZE = 50_000
+# Strings read as missing values
+CSV_NA_VALUES = ['', 'NULL', 'null', 'None', 'nan']
+# pandas' default missing-value strings, which the pyarrow reader adds explicitly
+# so both readers agree on what is missing
+PANDAS_DEFAULT_NA_VALUES = [
+    '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NaN', 'n/a'
+]
+# Bytes of CSV handed to each pyarrow parser thread
+CSV_BLOCK_SIZE = 8 << 20
+
+# Validation reports from parallel shards are merged into this file
+VALIDATION_REPORT_FILE = 'collation_validation_errors.log'
+VALIDATION_REPORT_HEADER = "COLLATION VALIDATION ERROR REPORT\n" + "=" * 50 + "\n\n"
+
+# Location cell: optional surrounding braces around either a JSON array or comma-separated values
+LOCATION_RE = re.compile(r'^[\s{}]*(?:(?P<json>\[.*\])|(?P<csv>.*?))[\s{}]*$', re.DOTALL)
+
+# Metadata columns copied server-side from original_all_products on insert,
+# so they never travel through Python
+METADATA_COLUMNS = [
+    'name', 'manufacturers', 'salt_composition', 'medicine_type', 'introduction',
+    'benefits', 'description', 'how_to_use', 'safety_advise', 'if_miss',
+    'packaging_detail', 'package', 'qty', 'product_form', 'mrp',
+    'prescription_required', 'fact_box', 'primary_use', 'storage', 'use_of',
+    'common_side_effect', 'alcohol_interaction', 'pregnancy_interaction',
+    'lactation_interaction', 'driving_interaction', 'kidney_interaction',
+    'liver_interaction', 'manufacturer_address', 'q_a', 'how_it_works',
+    'interaction', 'manufacturer_details', 'marketer_details', 'reference',
+    'normalized_name', 'image_url', 'plazza_price_pack', 'fulfilled_by',
+    'name_search_words', 'directions_for_use', 'information', 'key_benefits',
+    'key_ingredients', 'safety_information', 'breadcrumbs', 'country_of_origin'
+]
+# Pricing columns taken from distributor_master_list
+PRICING_COLUMNS = [
+    'distributor_mrp', 'plazza_selling_price_incl_gst', 'effective_customer_discount',
+    'distributor', 'gst_rate', 'hsn_code'
+]
+# JSONB and categorization columns, left empty to be populated later if needed
+EMPTY_COLUMNS = [
+    'c1', 'c2', 'c3', 'c4', 'c5',
+    'product_category_name', 'product_category_id', 'product_use_case_name',
+    'product_use_case_id', 'product_sub_category_id', 'product_sub_category_name'
+]
+# Column order of rows built in Python and staged for insert into catalogue
+# Note: delivery_type column doesn't exist in catalogue table
+# Delivery type is determined by inventory_quantity (0 = deferred, >0 = instant)
+# updated_at/created_at are left to the catalogue column defaults (CURRENT_TIMESTAMP)
+STAGED_COLUMNS = (
+    ['product_id', 'dist_item_code', 'inventory_quantity', 'location']
+    + PRICING_COLUMNS
+    + EMPTY_COLUMNS
+)
+# Numeric distributor_master_list columns, cast so psycopg returns floats directly;
+# zero maps to NULL as the price details have always treated it as missing
+PRICE_SELECT_COLUMNS = ', '.join(
+    f"NULLIF({col}, 0)::float8 AS {col}"
+    for col in ['mrp', 'purchase_rate', 'gst_rate', 'plazza_selling_price_incl_gst', 'effective_customer_discount']
+)
+# Price details built from each distributor_master_list row; lookups select
+# PRICE_SELECT_COLUMNS, distributor and hsn_code in this order
+PRICE_RECORD_FIELDS = [
+    'distributor_mrp', 'purchase_rate', 'gst_rate', 'plazza_selling_price_incl_gst',
+    'effective_customer_discount', 'distributor', 'hsn_code'
+]
+# Temporary table batches are copied into before being merged into catalogue
+STAGE_TABLE = 'catalogue_stage'
+# Streams a batch into the staging table
+STAGE_COPY_SQL = f"COPY {STAGE_TABLE} ({', '.join(STAGED_COLUMNS)}) FROM STDIN"
+# Merges a staged batch into catalogue, joining in the metadata columns and
+# letting the primary key skip existing products
+STAGE_INSERT_SQL = f"""
+    INSERT INTO catalogue ({', '.join(STAGED_COLUMNS + METADATA_COLUMNS)})
+    SELECT {', '.join([f's.{col}' for col in STAGED_COLUMNS] + [f'p.{col}' for col in METADATA_COLUMNS])}
+    FROM {STAGE_TABLE} s
+    JOIN original_all_products p ON p.product_id = s.product_id
+    ON CONFLICT (product_id) DO NOTHING
+"""
+# Session settings for the loading connection: long COPYs and merges must not
+# time out, and the merge gets room to sort/hash in memory
+LOAD_SESSION_SETTINGS = {
+    'statement_timeout': '0',
+    'work_mem': '256MB'
+}
+# Memory for each index rebuilt after a load
+INDEX_BUILD_MAINTENANCE_WORK_MEM = '1GB'
+# Definitions of catalogue indexes dropped for a load, kept until they are recreated
+INDEX_DDL_FILE = 'catalogue_dropped_indexes.sql'
+# Session-local table holding a batch's (product_id, item_code) pairs for the
+# single-JOIN lookup through postgres_fdw
+CSV_INPUT_TABLE = 'csv_input'
+CSV_INPUT_COPY_SQL = f"COPY {CSV_INPUT_TABLE} (product_id, item_code) FROM STDIN"
+# Rows fetched per round-trip from the server-side lookup cursor
+LOOKUP_ITERSIZE = 10_000
+
+@dataclass(frozen=True, slots=True)
+class DBConfig:
+    """Connection settings for one database, named as psycopg.connect expects them"""
+    host: str
+    port: int
+    dbname: str
+    user: str
+    # Kept out of repr so it never reaches logs or tracebacks
+    password: Optional[str] = field(default=None, repr=False)
+    sslmode: Optional[str] = None
+    sslrootcert: Optional[str] = None
+    # TCP keepalives and a send timeout, so a socket silently dropped during a
+    # long COPY or index build is detected instead of stalling the run
+    keepalives: int = 1
+    keepalives_idle: int = 30
+    keepalives_interval: int = 10
+    keepalives_count: int = 5
+    tcp_user_timeout: int = 60_000
+    
+    @classmethod
+    def from_env(cls, prefix: str, default_dbname: str, ssl_cert_var: str) -> 'DBConfig':
+        """Read a config from the {prefix}HOST/PORT/NAME/USERNAME/PASSWORD/SSLMODE variables
+        
+        The names match the backend's own configuration. Without a password
+        variable, libpq falls back to PGPASSWORD or ~/.pgpass.
+        """
+        env = os.environ
+        return cls(
+            host=env.get(f'{prefix}HOST', '127.0.0.1'),
+            port=int(env.get(f'{prefix}PORT', '5433')),
+            dbname=env.get(f'{prefix}NAME', default_dbname),
+            user=env.get(f'{prefix}USERNAME', 'postgres'),
+            password=env.get(f'{prefix}PASSWORD'),
+            sslmode=env.get(f'{prefix}SSLMODE', 'verify-ca'),
+            sslrootcert=env.get(ssl_cert_var)
+        )
+    
+    def connect_kwargs(self) -> Dict[str, Any]:
+        """psycopg.connect keyword arguments, leaving out unset settings
+        
+        Passing keywords avoids building a conninfo string, which breaks on
+        values containing spaces or quotes.
+        """
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
 class ErrorLogger:
-    """Thread-safe error logger for CSV output"""
+    """Error logger for CSV output, fed by a single producer and drained by a background writer"""
+    # Column order of the skipped rows CSV
+    COLUMNS = [
+        'product_id', 'item_code', 'name', 'error_timestamp',
+        'error_type', 'error_details', 'status'
+    ]
+    # Maximum number of buffered errors written per batch
+    WRITE_BATCH_SIZE = 1000
+    # Errors beyond this many pending entries are dropped and counted
+    BUFFER_CAPACITY = 65536
+    # Pending errors at which the writer is woken early, well before the buffer fills
+    HIGH_WATER_MARK = BUFFER_CAPACITY // 4
+    # Seconds the writer thread parks between drains
+    PARK_TIMEOUT = 0.5
+
     def __init__(self, error_file_prefix: str = 'collation_skipped_rows'):
-        self.error_queue = Queue()
-        self.error_rows = []
-        self.lock = threading.Lock()
+        # deque append/popleft are atomic, so producers never take a lock
+        self.error_buffer = deque()
+        self.dropped_errors = 0
         self.stop_event = threading.Event()
-        self.error_file = f'{error_file_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
+        # Set when the writer should drain before its park timeout elapses
+        self.data_ready = threading.Event()
+        self.error_file = f'{error_file_prefix}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv.gz'
+        # Keep the file open for the whole run; each write appends a complete gzip
+        # member, so the file stays readable up to the last batch even if the
+        # process is killed before stop()
+        self._fh = open(self.error_file, 'wb')
+        self._write_rows([self.COLUMNS])
         self.logger_thread = threading.Thread(target=self._process_errors)
         self.logger_thread.daemon = True
         self.logger_thread.start()
 
     def add_error(self, error_dict: Dict, error_type: str, error_details: str = None):
-        """Add an error to the queue for CSV logging"""
-        # Add timestamp and additional error information
-        error_dict['error_timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        error_dict['error_type'] = error_type
-        error_dict['error_details'] = error_details
-        error_dict['status'] = 'Skipped'
-        self.error_queue.put(error_dict)
+        """Add an error to the buffer for CSV logging, dropping it if the buffer is full"""
+        if len(self.error_buffer) >= self.BUFFER_CAPACITY:
+            self.dropped_errors += 1
+            return
+        # Buffer the row already in COLUMNS order, with timestamp and error information
+        self.error_buffer.append((
+            error_dict.get('product_id'),
+            error_dict.get('item_code'),
+            error_dict.get('name'),
+            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            error_type,
+            error_details,
+            'Skipped'
+        ))
+        if len(self.error_buffer) >= self.HIGH_WATER_MARK and not self.data_ready.is_set():
+            self.data_ready.set()
 
     def _process_errors(self):
         """Process errors in background thread"""
-        while not self.stop_event.is_set() or not self.error_queue.empty():
-            try:
-                error_dict = self.error_queue.get(timeout=1)
-                with self.lock:
-                    self.error_rows.append(error_dict)
-                    self._write_to_csv(error_dict)
-            except:
-                continue
+        while True:
+            # Park until woken by a filling buffer or stop(), or the timeout elapses,
+            # then drain; clearing first keeps a wake-up during the drain
+            self.data_ready.wait(self.PARK_TIMEOUT)
+            self.data_ready.clear()
+            stopping = self.stop_event.is_set()
+            self._drain()
+            if stopping:
+                break
 
-    def _write_to_csv(self, error_dict: Dict):
-        """Write error to CSV file"""
-        error_df = pd.DataFrame([error_dict])
-        
-        # Ensure columns are in a specific order
-        columns = [
-            'product_id', 'item_code', 'name', 'error_timestamp', 
-            'error_type', 'error_details', 'status'
-        ]
-        
-        # Reorder columns and fill missing columns with None
-        for col in columns:
-            if col not in error_df.columns:
-                error_df[col] = None
-        
-        error_df = error_df[columns]
-        
-        # Append to existing file or create new
-        mode = 'a' if os.path.exists(self.error_file) else 'w'
-        header = not os.path.exists(self.error_file)
-        
-        error_df.to_csv(self.error_file, mode=mode, header=header, index=False)
+    def _drain(self):
+        """Write all currently buffered errors in batches"""
+        while True:
+            batch = []
+            while len(batch) < self.WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self.error_buffer.popleft())
+                except IndexError:
+                    break
+            if not batch:
+                return
+            self._write_rows(batch)
+
+    def _write_rows(self, rows: List):
+        """Append rows to the file as one self-contained gzip member"""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        self._fh.write(gzip.compress(buffer.getvalue().encode('utf-8')))
+        self._fh.flush()
 
     def stop(self):
-        """Stop the error logger and write any remaining errors"""
+        """Stop the error logger and write any remaining errors; later calls do nothing"""
+        if self._fh.closed:
+            return
         self.stop_event.set()
+        self.data_ready.set()
         self.logger_thread.join()
-        # Write any remaining errors
-        if not self.error_queue.empty():
-            while not self.error_queue.empty():
-                error_dict = self.error_queue.get()
-                self._write_to_csv(error_dict)
-        logger.info(f"All skipped rows have been written to {self.error_file}")
+        # Write any errors added after the final drain
+        self._drain()
+        self._fh.close()
+        if self.dropped_errors:
+            logger.warning("Error buffer was full; %s skipped rows were not written to %s", self.dropped_errors, self.error_file)
+        logger.info("All skipped rows have been written to %s", self.error_file)
+
+class ValidationErrors:
+    """Validation failures stored column-wise, as parallel row index, product ID and error lists
+    
+    Avoids a dict per failed row on error-heavy runs; rows failing for the
+    same reason share one error list.
+    """
+    
+    __slots__ = ('row_indexes', 'product_ids', 'messages')
+    
+    def __init__(self):
+        self.row_indexes = array('q')
+        self.product_ids: List[Any] = []
+        self.messages: List[List[str]] = []
+    
+    def add(self, row_index: int, product_id: Any, errors: List[str]):
+        self.row_indexes.append(row_index)
+        self.product_ids.append(product_id)
+        self.messages.append(errors)
+    
+    def add_rows(self, rows: pd.DataFrame, errors: List[str]):
+        """Record the same errors for every row of a DataFrame"""
+        self.row_indexes.extend(rows.index)
+        self.product_ids.extend(rows['product_id'].tolist())
+        self.messages.extend([errors] * len(rows))
+    
+    def extend(self, other: 'ValidationErrors'):
+        self.row_indexes.extend(other.row_indexes)
+        self.product_ids.extend(other.product_ids)
+        self.messages.extend(other.messages)
+    
+    def __len__(self) -> int:
+        return len(self.product_ids)
+    
+    def __iter__(self) -> Iterator[Tuple[int, Any, List[str]]]:
+        return zip(self.row_indexes, self.product_ids, self.messages)
+
 
 class DataCollator:
     """Handles collation of data from multiple sources and migration to catalogue table"""
     
-    def __init__(self, db_config: Dict[str, str], erp_db_config: Dict[str, str]):
-        """Initialize collator with database configuration"""
+    def __init__(self, db_config: DBConfig, erp_db_config: DBConfig, erp_fdw_schema: Optional[str] = None,
+                 commit_every: int = 10_000, synchronous_commit: bool = True, shard: Tuple[int, int] = (0, 1),
+                 rebuild_indexes: bool = False):
+        """Initialize collator with database configuration
+        
+        erp_fdw_schema names a schema on the main database holding a postgres_fdw
+        foreign table for distributor_master_list. When set, metadata and pricing
+        are fetched together with a single server-side JOIN.
+        
+        Batches are committed together once commit_every rows have been staged.
+        synchronous_commit=False turns it off for the loading session, trading
+        durability of the last commits on a server crash for fewer WAL flushes;
+        only use it when the load can be re-run from the CSV.
+        
+        shard=(i, n) processes only the CSV rows whose product_id hashes to shard i
+        of n, so n collators can load disjoint parts of the same file in parallel.
+        
+        rebuild_indexes=True drops catalogue's secondary indexes for the load and
+        recreates them afterwards. It is ignored for sharded runs, whose driver
+        has to do it once around all shards.
+        """
         self.db_config = db_config
         self.erp_db_config = erp_db_config
+        self.erp_fdw_schema = erp_fdw_schema
+        self.commit_every = commit_every
+        self.synchronous_commit = synchronous_commit
+        self.shard_index, self.shard_count = shard
+        self.rebuild_indexes = rebuild_indexes and self.shard_count == 1
+        # Sharded runs write their reports to per-shard files
+        file_suffix = f'_shard{self.shard_index}of{self.shard_count}' if self.shard_count > 1 else ''
+        self.validation_report_file = VALIDATION_REPORT_FILE.replace('.log', f'{file_suffix}.log')
         self.connection = None
+        self.insert_cursor = None
+        self.lookup_connection = None
         self.erp_connection = None
-        self.validation_errors = []
-        self.error_logger = ErrorLogger('collation_skipped_rows')
+        self.validation_errors = ValidationErrors()
+        self.error_logger = ErrorLogger(f'collation_skipped_rows{file_suffix}')
         self.skipped_no_metadata = 0
         self.skipped_no_pricing = 0
+        # Price details by lowercased item code for the whole run, None when not
+        # found; item codes recur across batches, unlike product IDs
+        self.price_cache: Dict[str, Optional[Dict]] = {}
         
     def connect_db(self) -> bool:
         """Establish database connections"""
         try:
-            def build_conninfo(cfg: Dict[str, str]) -> str:
-                parts = []
-                if cfg.get('host'):
-                    parts.append(f"host={cfg['host']}")
-                if cfg.get('port'):
-                    parts.append(f"port={cfg['port']}")
-                # psycopg expects dbname
-                dbname = cfg.get('dbname') or cfg.get('database')
-                if dbname:
-                    parts.append(f"dbname={dbname}")
-                if cfg.get('user'):
-                    parts.append(f"user={cfg['user']}")
-                if cfg.get('password'):
-                    parts.append(f"password={cfg['password']}")
-                if cfg.get('sslmode'):
-                    parts.append(f"sslmode={cfg['sslmode']}")
-                if cfg.get('sslrootcert'):
-                    parts.append(f"sslrootcert={cfg['sslrootcert']}")
-                return ' '.join(parts)
-
             # Connect to main database (defaultdb)
-            main_conninfo = build_conninfo(self.db_config)
-            self.connection = psycopg.connect(main_conninfo)
+            main_kwargs = self.db_config.connect_kwargs()
+            self.connection = psycopg.connect(**main_kwargs)
             self.connection.autocommit = False  # Enable transaction control
+            # Session-local staging table that COPY writes into before the
+            # conflict-aware insert into catalogue
+            self.connection.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} "
+                f"(LIKE catalogue INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            for setting, value in LOAD_SESSION_SETTINGS.items():
+                self.connection.execute(sql.SQL("SET {} = {}").format(sql.Identifier(setting), sql.Literal(value)))
+            if not self.synchronous_commit:
+                self.connection.execute("SET synchronous_commit = off")
+            self.connection.commit()
+            # One cursor carries every batch's COPY and merge for the whole run
+            self.insert_cursor = self.connection.cursor()
             logger.info("Main database connection established successfully")
 
+            # Lookups are prefetched on a background thread while the main connection
+            # inserts, so they get their own read-only autocommit connections.
+            # They are executed with prepare=True, so each is parsed and planned
+            # once per connection rather than once per batch
+            self.lookup_connection = psycopg.connect(**main_kwargs, autocommit=True)
+            if self.erp_fdw_schema:
+                self.lookup_connection.execute(
+                    f"CREATE TEMP TABLE IF NOT EXISTS {CSV_INPUT_TABLE} "
+                    f"(product_id text, item_code text) ON COMMIT DELETE ROWS"
+                )
+            logger.info("Lookup database connection established successfully")
+
             # Connect to ERP database for distributor_master_list
-            erp_conninfo = build_conninfo(self.erp_db_config)
-            self.erp_connection = psycopg.connect(erp_conninfo)
+            self.erp_connection = psycopg.connect(**self.erp_db_config.connect_kwargs(), autocommit=True)
             logger.info("ERP database connection established successfully")
 
             return True
         except Exception as e:
-            logger.error(f"Failed to connect to database: {e}")
+            logger.error("Failed to connect to database: %s", e)
             return False
     
     def disconnect_db(self):
         """Close database connections"""
+        if self.insert_cursor:
+            self.insert_cursor.close()
         if self.connection:
             self.connection.close()
             logger.info("Main database connection closed")
+        if self.lookup_connection:
+            self.lookup_connection.close()
+            logger.info("Lookup database connection closed")
         if self.erp_connection:
             self.erp_connection.close()
             logger.info("ERP database connection closed")
     
-    def load_csv(self, csv_file_path: str) -> Optional[pd.DataFrame]:
-        """Load and validate CSV file"""
+    def load_csv(self, csv_file_path: str, chunksize: int = CSV_CHUNK_SIZE) -> Optional[Iterator[pd.DataFrame]]:
+        """Open CSV file as an iterator of chunks so memory stays bounded by the chunk size"""
         try:
-            logger.info(f"Loading CSV file: {csv_file_path}")
+            logger.info("Loading CSV file: %s", csv_file_path)
+            
+            # Check the header before either reader is chosen, so a missing column
+            # fails here rather than partway through the run
+            columns = self._read_csv_columns(csv_file_path)
             
-            # Read CSV with proper handling
-            df = pd.read_csv(
+            if pa is not None:
+                # Open the reader here rather than in the generator, so a missing file
+                # fails now instead of on the first batch
+                df_iter = self._read_csv_arrow(self._open_csv_arrow(csv_file_path, columns), chunksize)
+                logger.info("CSV opened with pyarrow. Reading in chunks of %s rows", chunksize)
+                return df_iter
+            
+            # Read CSV with proper handling, keeping only the columns used downstream
+            df_iter = pd.read_csv(
                 csv_file_path,
                 encoding='utf-8',
                 dtype=str,  # Load all as strings initially for validation
-                na_values=['', 'NULL', 'null', 'None', 'nan'],
-                keep_default_na=True
+                na_values=CSV_NA_VALUES,
+                keep_default_na=True,
+                usecols=lambda col: col in CSV_COLUMNS,
+                chunksize=chunksize
             )
             
-            logger.info(f"CSV loaded successfully. Shape: {df.shape}")
-            logger.info(f"Columns: {list(df.columns)}")
+            logger.info("CSV opened successfully. Reading in chunks of %s rows", chunksize)
             
-            return df
+            return df_iter
             
         except Exception as e:
-            logger.error(f"Failed to load CSV file: {e}")
+            logger.error("Failed to load CSV file: %s", e)
             return None
     
+    @staticmethod
+    def _read_csv_columns(csv_file_path: str) -> List[str]:
+        """Return the used columns present in the CSV header
+        
+        Raises if a required column is missing from the header.
+        """
+        with open(csv_file_path, newline='', encoding='utf-8-sig') as f:
+            header = next(csv.reader(f), [])
+        missing = [col for col in REQUIRED_CSV_COLUMNS if col not in header]
+        if missing:
+            raise ValueError(f"CSV is missing required columns: {missing}")
+        return [col for col in CSV_COLUMNS if col in header]
+    
+    @staticmethod
+    def _open_csv_arrow(csv_file_path: str, columns: List[str]) -> 'pacsv.CSVStreamingReader':
+        """Open a memory-mapped CSV with pyarrow's streaming reader
+        
+        Mirrors the pandas reader: every column is a string, the same values count
+        as missing, and only the given columns are read.
+        """
+        return pacsv.open_csv(
+            pa.memory_map(csv_file_path),
+            read_options=pacsv.ReadOptions(use_threads=True, block_size=CSV_BLOCK_SIZE),
+            # Quoted fields may span lines, as pandas allows
+            parse_options=pacsv.ParseOptions(newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types={col: pa.string() for col in columns},
+                include_columns=columns,
+                null_values=CSV_NA_VALUES + PANDAS_DEFAULT_NA_VALUES,
+                strings_can_be_null=True
+            )
+        )
+    
+    @staticmethod
+    def _read_csv_arrow(reader: 'pacsv.CSVStreamingReader', chunksize: int) -> Iterator[pd.DataFrame]:
+        """Yield DataFrames of chunksize rows from a pyarrow CSV reader, with the row index running on across chunks"""
+        def to_frame(table: 'pa.Table', start: int) -> pd.DataFrame:
+            df = table.to_pandas()
+            df.index = pd.RangeIndex(start, start + len(df))
+            return df
+        
+        # Parser blocks hold a varying number of rows, so regroup them into chunks
+        start = 0
+        pending = []
+        pending_rows = 0
+        for record_batch in reader:
+            pending.append(record_batch)
+            pending_rows += record_batch.num_rows
+            while pending_rows >= chunksize:
+                table = pa.Table.from_batches(pending, schema=reader.schema)
+                yield to_frame(table.slice(0, chunksize), start)
+                start += chunksize
+                rest = table.slice(chunksize)
+                pending = rest.to_batches()
+                pending_rows = rest.num_rows
+        if pending_rows:
+            yield to_frame(pa.Table.from_batches(pending, schema=reader.schema), start)
+    
+    def get_existing_products_batch(self, product_ids: List[str]) -> set:
+        """Get the given product IDs that are already in catalogue
+        
+        Lets a batch drop existing products before they are looked up, validated
+        and staged; the insert's ON CONFLICT still skips any that slip through.
+        """
+        if not product_ids:
+            return set()
+        
+        query = """
+        SELECT c.product_id
+        FROM unnest(%b::text[]) AS k(pid)
+        JOIN catalogue c ON c.product_id = k.pid
+        """
+        
+        try:
+            with self.lookup_connection.cursor() as cursor:
+                cursor.execute(query, (product_ids,), prepare=True, binary=True)
+                existing = {row[0] for row in cursor}
+            
+            logger.info("Found %s out of %s products already in catalogue", len(existing), len(product_ids))
+            return existing
+        except Exception as e:
+            logger.error("Error fetching existing products: %s", e)
+            return set()
+    
     def get_metadata_batch(self, product_ids: List[str]) -> Dict[str, Dict]:
-        """Get metadata from original_all_products table for multiple product IDs"""
+        """Get names of the given product IDs found in original_all_products
+        
+        Only presence and name are needed here; the remaining metadata columns are
+        copied server-side when the batch is inserted.
+        """
         if not product_ids:
             return {}
         
         query = """
-        SELECT product_id, name, manufacturers, salt_composition, medicine_type,
-               introduction, benefits, description, how_to_use, safety_advise,
-               if_miss, packaging_detail, package, qty, product_form, mrp,
-               prescription_required, fact_box, primary_use, storage, use_of,
-               common_side_effect, alcohol_interaction, pregnancy_interaction,
-               lactation_interaction, driving_interaction, kidney_interaction,
-               liver_interaction, manufacturer_address, q_a, how_it_works,
-               interaction, manufacturer_details, marketer_details, reference,
-               normalized_name, image_url, distributor_mrp, plazza_selling_price_incl_gst,
-               effective_customer_discount, distributor, plazza_price_pack,
-               fulfilled_by, name_search_words, directions_for_use, information,
-               key_benefits, key_ingredients, safety_information, breadcrumbs,
-               country_of_origin
-        FROM original_all_products
-        WHERE product_id = ANY(%s)
+        SELECT p.product_id, p.name
+        FROM unnest(%b::text[]) AS k(pid)
+        JOIN original_all_products p ON p.product_id = k.pid
         """
         
         try:
-            with self.connection.cursor(row_factory=dict_row) as cursor:
-                cursor.execute(query, (product_ids,))
-                results = cursor.fetchall()
-            
-            metadata = {}
-            for row in results:
-                metadata[row['product_id']] = dict(row)
+            # Plain tuple rows, unpacked by position
+            with self.lookup_connection.cursor() as cursor:
+                cursor.execute(query, (product_ids,), prepare=True, binary=True)
+                metadata = {product_id: {'name': name} for product_id, name in cursor}
             
-            logger.info(f"Found metadata for {len(metadata)} out of {len(product_ids)} product IDs")
+            logger.info("Found metadata for %s out of %s product IDs", len(metadata), len(product_ids))
             if metadata:
-                logger.info(f"Sample metadata keys: {list(metadata.keys())[:3]}")
+                logger.info("Sample metadata keys: %s", list(metadata.keys())[:3])
             return metadata
         except Exception as e:
-            logger.error(f"Error fetching metadata: {str(e)}")
+            logger.error("Error fetching metadata: %s", e)
             return {}
     
     def get_price_details_batch(self, item_codes: List[str]) -> Dict[str, Dict]:
-        """Get price details from distributor_master_list for multiple item codes"""
+        """Get price details from distributor_master_list for multiple item codes
+        
+        Only codes not seen earlier in the run are queried; the rest come from price_cache.
+        """
         if not item_codes:
             return {}
         
         # Create mapping of original codes to lowercase versions for searching
         code_mapping = {}
-        lowercase_codes = []
         for code in item_codes:
             if code and str(code).strip():
                 clean_code = str(code).strip()
-                lowercase_code = clean_code.lower()
-                code_mapping[lowercase_code] = clean_code
-                lowercase_codes.append(lowercase_code)
+                code_mapping[clean_code.lower()] = clean_code
+        lowercase_codes = [code for code in code_mapping if code not in self.price_cache]
         
-        if not lowercase_codes:
+        if lowercase_codes and not self._fetch_price_details(lowercase_codes):
             return {}
         
-        query = """
-        SELECT item_code, product_name, manufacturer, mrp, purchase_rate, gst_rate,
-               plazza_selling_price_incl_gst, effective_customer_discount, distributor,
-               hsn_code, original_item_code
-        FROM distributor_master_list
-        WHERE LOWER(item_code) = ANY(%s) OR LOWER(original_item_code) = ANY(%s)
+        price_details = {}
+        for lowercase_code, original_code in code_mapping.items():
+            record = self.price_cache[lowercase_code]
+            if record is not None:
+                price_details[original_code] = record
+        
+        logger.info("Found price details for %s out of %s item codes (%s codes from cache)",
+                    len(price_details), len(item_codes), len(code_mapping) - len(lowercase_codes))
+        if price_details:
+            logger.info("Sample price keys: %s", list(price_details.keys())[:3])
+        return price_details
+    
+    def _fetch_price_details(self, lowercase_codes: List[str]) -> bool:
+        """Query price details for lowercased item codes into price_cache
+        
+        Codes without a match are cached as None. Returns False if the query failed,
+        leaving the codes uncached so a later batch retries them.
+        """        
+        # Each branch of the UNION ALL probes its own expression index
+        # (see distributor_master_list_indexes.sql) once per unnested code;
+        # the second branch skips rows the first one already returned
+        query = f"""
+        SELECT item_code, original_item_code, {PRICE_SELECT_COLUMNS}, distributor, hsn_code
+        FROM unnest(%b::text[]) AS k(code)
+        JOIN distributor_master_list d ON LOWER(d.item_code) = k.code
+        UNION ALL
+        SELECT item_code, original_item_code, {PRICE_SELECT_COLUMNS}, distributor, hsn_code
+        FROM unnest(%b::text[]) AS k(code)
+        JOIN distributor_master_list d ON LOWER(d.original_item_code) = k.code
+        WHERE d.item_code IS NULL OR LOWER(d.item_code) <> ALL(%b::text[])
         """
         
         try:
-            with self.erp_connection.cursor(row_factory=dict_row) as cursor:
-                cursor.execute(query, (lowercase_codes, lowercase_codes))
+            with self.erp_connection.cursor() as cursor:
+                cursor.execute(query, (lowercase_codes, lowercase_codes, lowercase_codes), prepare=True, binary=True)
                 results = cursor.fetchall()
             
-            price_details = {}
-            
+            found = dict.fromkeys(lowercase_codes)
+            # A code matches on item_code first; an original_item_code match only
+            # fills codes no row has as its item_code, as in the fdw lookup
+            original_matches = {}
             for row in results:
-                # Map both item_code and original_item_code variations
-                for code_field in ['item_code', 'original_item_code']:
-                    if row[code_field]:
-                        original_code = code_mapping.get(row[code_field].lower())
-                        if original_code:
-                            price_details[original_code] = {
-                                'distributor_mrp': float(row['mrp']) if row['mrp'] else None,
-                                'purchase_rate': float(row['purchase_rate']) if row['purchase_rate'] else None,
-                                'gst_rate': float(row['gst_rate']) if row['gst_rate'] else None,
-                                'plazza_selling_price_incl_gst': float(row['plazza_selling_price_incl_gst']) if row['plazza_selling_price_incl_gst'] else None,
-                                'effective_customer_discount': float(row['effective_customer_discount']) if row['effective_customer_discount'] else None,
-                                'distributor': row['distributor'],
-                                'hsn_code': row['hsn_code']
-                            }
-            
-            logger.info(f"Found price details for {len(price_details)} out of {len(item_codes)} item codes")
-            if price_details:
-                logger.info(f"Sample price keys: {list(price_details.keys())[:3]}")
-            return price_details
+                item_code, original_item_code = row[:2]
+                if item_code and item_code.lower() in found:
+                    found[item_code.lower()] = self._price_record(row[2:])
+                if original_item_code and original_item_code.lower() in found:
+                    original_matches[original_item_code.lower()] = row
+            for code, row in original_matches.items():
+                if found[code] is None:
+                    found[code] = self._price_record(row[2:])
+            
+            self.price_cache.update(found)
+            return True
         except Exception as e:
-            logger.error(f"Error fetching price details: {str(e)}")
-            return {}
+            logger.error("Error fetching price details: %s", e)
+            return False
+    
+    @staticmethod
+    def _price_record(values: Tuple) -> Dict[str, Any]:
+        """Build the price details from a distributor_master_list row's price columns
+        
+        Numeric columns arrive as floats (zero mapped to NULL) from the SQL casts.
+        """
+        return dict(zip(PRICE_RECORD_FIELDS, values))
     
-    def validate_and_collate_row(self, row: pd.Series, row_index: int, metadata: Dict[str, Dict], price_details: Dict[str, Dict]) -> Tuple[bool, Dict[str, Any]]:
-        """Validate and collate data from multiple sources for a single row"""
-        errors = []
-        collated_data = {}
+    def get_collated_batch(self, product_ids: List[str], item_codes: List[str]) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+        """Get metadata and price details for (product_id, item_code) pairs
+        
+        Uses one JOIN on the main database when distributor_master_list is reachable
+        there through postgres_fdw, otherwise falls back to one query per database.
+        The JOIN reads the pairs from a COPY-filled temp table and streams its
+        results back through a server-side cursor.
+        """
+        if not self.erp_fdw_schema:
+            return (
+                self.get_metadata_batch(product_ids),
+                self.get_price_details_batch([code for code in item_codes if code and code != 'nan'])
+            )
+        
+        if not product_ids:
+            return {}, {}
+        
+        # LEFT JOINs keep pairs with a missing side so they can be reported as skipped.
+        # The item code is matched by two plain equality joins rather than one OR, so
+        # each can be a hash join; original_item_code is only used when item_code
+        # has no match, in which case every d1 column is NULL and COALESCE picks d2.
+        # A match is flagged on the join keys, since a d2 row's item_code may be NULL.
+        query = sql.SQL("""
+        SELECT i.item_code AS lookup_code, p.product_id, p.name,
+               (d1.item_code IS NOT NULL OR d2.original_item_code IS NOT NULL) AS dml_matched,
+               NULLIF(COALESCE(d1.mrp, d2.mrp), 0)::float8 AS dml_mrp,
+               NULLIF(COALESCE(d1.purchase_rate, d2.purchase_rate), 0)::float8 AS dml_purchase_rate,
+               NULLIF(COALESCE(d1.gst_rate, d2.gst_rate), 0)::float8 AS dml_gst_rate,
+               NULLIF(COALESCE(d1.plazza_selling_price_incl_gst, d2.plazza_selling_price_incl_gst), 0)::float8 AS dml_plazza_selling_price_incl_gst,
+               NULLIF(COALESCE(d1.effective_customer_discount, d2.effective_customer_discount), 0)::float8 AS dml_effective_customer_discount,
+               COALESCE(d1.distributor, d2.distributor) AS dml_distributor,
+               COALESCE(d1.hsn_code, d2.hsn_code) AS dml_hsn_code
+        FROM {input} i
+        LEFT JOIN original_all_products p ON p.product_id = i.product_id
+        LEFT JOIN {schema}.distributor_master_list d1
+               ON LOWER(d1.item_code) = LOWER(i.item_code)
+        LEFT JOIN {schema}.distributor_master_list d2
+               ON LOWER(d2.original_item_code) = LOWER(i.item_code) AND d1.item_code IS NULL
+        """).format(input=sql.Identifier(CSV_INPUT_TABLE), schema=sql.Identifier(self.erp_fdw_schema))
         
         try:
-            # Get basic info from CSV
-            product_id = str(row.get('product_id', '')).strip()
-            item_code = str(row.get('item_code', '')).strip()
-            
-            # Validate required fields
-            if not product_id or product_id == '':
-                errors.append("Product ID is required")
-                return False, {'errors': errors, 'data': {}}
-            
-            if not item_code or item_code == '':
-                errors.append("Item code is required")
-                return False, {'errors': errors, 'data': {}}
-            
-            # Get metadata from original_all_products
-            product_metadata = metadata.get(product_id)
-            if not product_metadata:
-                error_dict = {
-                    'product_id': product_id,
-                    'item_code': item_code,
-                    'name': ''
-                }
-                self.error_logger.add_error(
-                    error_dict,
-                    error_type='Missing Metadata',
-                    error_details=f"Product metadata not found in original_all_products for product_id: {product_id}"
-                )
-                self.skipped_no_metadata += 1
-                logger.warning(f"Row {row_index}: Skipping product - No metadata found for product_id '{product_id}'")
-                return False, {'errors': ['Missing metadata'], 'data': {}}
-            
-            # Get pricing data from distributor_master_list
-            pricing_data = price_details.get(item_code, {})
-            if not pricing_data:
-                error_dict = {
-                    'product_id': product_id,
-                    'item_code': item_code,
-                    'name': product_metadata.get('name', '')
-                }
-                self.error_logger.add_error(
-                    error_dict,
-                    error_type='Missing Price Details',
-                    error_details=f"Price details not found in distributor_master_list for item_code: {item_code}"
-                )
-                self.skipped_no_pricing += 1
-                logger.warning(f"Row {row_index}: Skipping product - No pricing data found for item_code '{item_code}'")
-                return False, {'errors': ['Missing pricing data'], 'data': {}}
-            
-            # Process inventory and location from CSV
-            inventory_quantity = self._validate_inventory_quantity(row.get('Store Inventory', 0), errors)
-            location = self._validate_location_array(row.get('Location', ''), errors)
-            
-            # Collate all data
-            collated_data = {
-                # Basic identifiers
-                'product_id': product_id,
-                'dist_item_code': item_code,
-                
-                # Metadata from original_all_products
-                'name': product_metadata.get('name'),
-                'manufacturers': product_metadata.get('manufacturers'),
-                'salt_composition': product_metadata.get('salt_composition'),
-                'medicine_type': product_metadata.get('medicine_type'),
-                'introduction': product_metadata.get('introduction'),
-                'benefits': product_metadata.get('benefits'),
-                'description': product_metadata.get('description'),
-                'how_to_use': product_metadata.get('how_to_use'),
-                'safety_advise': product_metadata.get('safety_advise'),
-                'if_miss': product_metadata.get('if_miss'),
-                'packaging_detail': product_metadata.get('packaging_detail'),
-                'package': product_metadata.get('package'),
-                'qty': product_metadata.get('qty'),
-                'product_form': product_metadata.get('product_form'),
-                'mrp': product_metadata.get('mrp'),
-                'prescription_required': product_metadata.get('prescription_required'),
-                'fact_box': product_metadata.get('fact_box'),
-                'primary_use': product_metadata.get('primary_use'),
-                'storage': product_metadata.get('storage'),
-                'use_of': product_metadata.get('use_of'),
-                'common_side_effect': product_metadata.get('common_side_effect'),
-                'alcohol_interaction': product_metadata.get('alcohol_interaction'),
-                'pregnancy_interaction': product_metadata.get('pregnancy_interaction'),
-                'lactation_interaction': product_metadata.get('lactation_interaction'),
-                'driving_interaction': product_metadata.get('driving_interaction'),
-                'kidney_interaction': product_metadata.get('kidney_interaction'),
-                'liver_interaction': product_metadata.get('liver_interaction'),
-                'manufacturer_address': product_metadata.get('manufacturer_address'),
-                'q_a': product_metadata.get('q_a'),
-                'how_it_works': product_metadata.get('how_it_works'),
-                'interaction': product_metadata.get('interaction'),
-                'manufacturer_details': product_metadata.get('manufacturer_details'),
-                'marketer_details': product_metadata.get('marketer_details'),
-                'reference': product_metadata.get('reference'),
-                'normalized_name': product_metadata.get('normalized_name'),
-                'image_url': product_metadata.get('image_url'),
-                'plazza_price_pack': product_metadata.get('plazza_price_pack'),
-                'fulfilled_by': product_metadata.get('fulfilled_by', 'Fulfilled by Plazza'),
-                'name_search_words': product_metadata.get('name_search_words'),
-                'directions_for_use': product_metadata.get('directions_for_use'),
-                'information': product_metadata.get('information'),
-                'key_benefits': product_metadata.get('key_benefits'),
-                'key_ingredients': product_metadata.get('key_ingredients'),
-                'safety_information': product_metadata.get('safety_information'),
-                'breadcrumbs': product_metadata.get('breadcrumbs'),
-                'country_of_origin': product_metadata.get('country_of_origin'),
-                
-                # Inventory and location from CSV
-                'inventory_quantity': inventory_quantity,
-                'location': location,
-                
-                # Pricing data from distributor_master_list
-                'distributor_mrp': pricing_data.get('distributor_mrp'),
-                'plazza_selling_price_incl_gst': pricing_data.get('plazza_selling_price_incl_gst'),
-                'effective_customer_discount': pricing_data.get('effective_customer_discount'),
-                'distributor': pricing_data.get('distributor'),
-                'gst_rate': pricing_data.get('gst_rate'),
-                'hsn_code': pricing_data.get('hsn_code'),
-                
-                # Timestamps
-                'updated_at': datetime.now(),
-                'created_at': datetime.now(),
-                
-                # Note: delivery_type column doesn't exist in catalogue table
-                # Delivery type is determined by inventory_quantity (0 = deferred, >0 = instant)
-                
-                # JSONB columns for flexible data storage
-                'c1': None,
-                'c2': None, 
-                'c3': None,
-                'c4': None,
-                'c5': None,
+            metadata = {}
+            price_details = {}
+            # Server-side cursors only live inside a transaction, which also
+            # empties the temp input table when it commits
+            with self.lookup_connection.transaction():
+                with self.lookup_connection.cursor() as cursor:
+                    with cursor.copy(CSV_INPUT_COPY_SQL) as copy:
+                        for pair in zip(product_ids, item_codes):
+                            copy.write_row(pair)
+                    # Temp tables are never auto-analyzed; fresh row counts let the planner
+                    # size the two equality hash joins and build each on the smaller side
+                    cursor.execute(f"ANALYZE {CSV_INPUT_TABLE}")
                 
-                # Categorization fields (to be populated later if needed)
-                'product_category_name': None,
-                'product_category_id': None,
-                'product_use_case_name': None,
-                'product_use_case_id': None,
-                'product_sub_category_id': None,
-                'product_sub_category_name': None
-            }
-            
-            if errors:
-                logger.warning(f"Row {row_index} validation errors: {'; '.join(errors)}")
-                return False, {'errors': errors, 'data': collated_data}
-            
-            return True, collated_data
+                with self.lookup_connection.cursor(name='collate_stream') as cursor:
+                    cursor.itersize = LOOKUP_ITERSIZE
+                    cursor.execute(query)
+                    for row in cursor:
+                        lookup_code, product_id, name, dml_matched = row[:4]
+                        if product_id is not None:
+                            metadata[product_id] = {'name': name}
+                        if dml_matched:
+                            price_details[lookup_code] = self._price_record(row[4:])
             
+            logger.info("Found metadata for %s and price details for %s out of %s products", len(metadata), len(price_details), len(product_ids))
+            return metadata, price_details
         except Exception as e:
-            error_msg = f"Unexpected error collating row {row_index}: {str(e)}"
-            logger.error(error_msg)
-            return False, {'errors': [error_msg], 'data': {}}
+            logger.error("Error fetching collated data: %s", e)
+            return {}, {}
     
-    def _validate_inventory_quantity(self, value: Any, errors: List[str]) -> int:
-        """Validate inventory quantity from Store Inventory column"""
-        try:
-            if pd.isna(value) or value == '' or str(value).strip() == '':
-                return 0  # Default value when Store Inventory is blank
-            inventory_qty = int(float(str(value)))
-            if inventory_qty < 0:
-                errors.append("Inventory quantity cannot be negative")
-                return 0
-            return inventory_qty
-        except (ValueError, TypeError):
-            errors.append(f"Invalid inventory quantity format: {value}")
-            return 0
-    
-    def _validate_location_array(self, value: Any, errors: List[str]) -> Optional[List[str]]:
-        """Validate and convert location to array format"""
-        if pd.isna(value) or value == '' or value == 'nan':
-            return None
+    def validate_and_collate_batch(self, df_chunk: pd.DataFrame, metadata: Dict[str, Dict], price_details: Dict[str, Dict]) -> Tuple[List[Tuple], ValidationErrors]:
+        """Validate and collate data from multiple sources for a batch of rows
+        
+        Returns the collated rows as tuples in STAGED_COLUMNS order, ready for COPY,
+        and the validation failures.
+        """
+        failures = ValidationErrors()
+        
+        # Validate required fields
+        product_ids = df_chunk['product_id'].fillna('')
+        item_codes = df_chunk['item_code'].fillna('')
+        missing_product_id = product_ids == ''
+        missing_item_code = ~missing_product_id & (item_codes == '')
+        failures.add_rows(df_chunk[missing_product_id], ["Product ID is required"])
+        failures.add_rows(df_chunk[missing_item_code], ["Item code is required"])
+        rows = df_chunk[~(missing_product_id | missing_item_code)]
+        
+        # Join product names from original_all_products; rows without a match are skipped
+        meta_df = self._lookup_frame(metadata, ['name'])
+        with_metadata = rows.join(meta_df, on='product_id', how='inner')
+        no_metadata = rows.loc[rows.index.difference(with_metadata.index)]
+        for index, row in no_metadata.iterrows():
+            self.error_logger.add_error(
+                {'product_id': row['product_id'], 'item_code': row['item_code'], 'name': ''},
+                error_type='Missing Metadata',
+                error_details=f"Product metadata not found in original_all_products for product_id: {row['product_id']}"
+            )
+            logger.warning("Row %s: Skipping product - No metadata found for product_id '%s'", index, row['product_id'])
+        self.skipped_no_metadata += len(no_metadata)
+        failures.add_rows(no_metadata, ['Missing metadata'])
+        
+        # Join pricing data from distributor_master_list; rows without a match are skipped
+        price_df = self._lookup_frame(price_details, PRICING_COLUMNS)
+        collated = with_metadata.join(price_df, on='item_code', how='inner')
+        no_pricing = with_metadata.loc[with_metadata.index.difference(collated.index)]
+        for index, row in no_pricing.iterrows():
+            self.error_logger.add_error(
+                {'product_id': row['product_id'], 'item_code': row['item_code'], 'name': row['name']},
+                error_type='Missing Price Details',
+                error_details=f"Price details not found in distributor_master_list for item_code: {row['item_code']}"
+            )
+            logger.warning("Row %s: Skipping product - No pricing data found for item_code '%s'", index, row['item_code'])
+        self.skipped_no_pricing += len(no_pricing)
+        failures.add_rows(no_pricing, ['Missing pricing data'])
+        
+        # Process inventory and location from CSV
+        inventory_quantity, inventory_errors = self._validate_inventory_quantity(
+            collated['Store Inventory'] if 'Store Inventory' in collated else pd.Series(None, index=collated.index, dtype=object)
+        )
+        location = self._validate_location_array(
+            collated['Location'] if 'Location' in collated else pd.Series(None, index=collated.index, dtype=object)
+        )
+        
+        invalid = inventory_errors.notna()
+        for index, error in inventory_errors[invalid].items():
+            logger.warning("Row %s validation errors: %s", index, error)
+            failures.add(index, collated.at[index, 'product_id'], [error])
+        collated = collated[~invalid]
+        
+        # Collate CSV and pricing data in staging column order; metadata is joined in on insert
+        collated = collated.assign(
+            dist_item_code=collated['item_code'],
+            inventory_quantity=inventory_quantity[~invalid],
+            location=location[~invalid],
+            **{col: None for col in EMPTY_COLUMNS}
+        )[STAGED_COLUMNS].astype(object)
+        collated = collated.where(collated.notna(), None)
+        
+        # Positional tuples are zipped straight from the column arrays, with no per-row dicts
+        return list(collated.itertuples(index=False, name=None)), failures
+    
+    @staticmethod
+    def _lookup_frame(lookup: Dict[str, Dict], columns: List[str]) -> pd.DataFrame:
+        """Build a DataFrame of lookup results indexed by key, for the validation joins
+
+        An empty lookup would otherwise get an int64 index, and pandas refuses to
+        join that against an empty string column, as when no row of a batch has
+        metadata. Such a batch must instead skip every row as missing.
+        """
+        return pd.DataFrame.from_dict(lookup, orient='index', columns=columns).set_axis(
+            pd.Index(list(lookup), dtype=object)
+        )
+    
+    def _validate_inventory_quantity(self, values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """Validate inventory quantities from Store Inventory column
+        
+        Returns the quantities (0 when blank or invalid) and a per-row error message (None when valid).
+        """
+        blank = values.isna() | (values.astype(str).str.strip() == '')
+        numeric = pd.to_numeric(values.where(~blank), errors='coerce')
+        # Values outside the bigint range (infinity included) would wrap around when cast
+        out_of_range = (numeric < -2**63) | (numeric >= 2**63)
+        malformed = ~blank & (numeric.isna() | out_of_range)
+        quantity = numeric.where(~(blank | malformed), 0).astype('int64')
+        negative = quantity < 0
+        
+        errors = pd.Series(None, index=values.index, dtype=object)
+        errors[malformed] = "Invalid inventory quantity format: " + values[malformed].astype(str)
+        errors[negative] = "Inventory quantity cannot be negative"
+        return quantity.where(~negative, 0), errors
+    
+    def _validate_location_array(self, values: pd.Series) -> pd.Series:
+        """Convert locations to arrays; accepts JSON arrays, comma-separated or single values"""
+        # One vectorised regex pass splits the JSON and comma-separated forms
+        extracted = values.astype(str).where(values.notna()).str.extract(LOCATION_RE)
+        parts = extracted['csv'].astype(object).str.split(',')
         
+        # JSON arrays are decoded individually; undecodable ones fall back to comma splitting
+        for index, value in extracted['json'].dropna().items():
+            try:
+                loc_list = json_loads(value)
+            except ValueError:
+                loc_list = None
+            parts.at[index] = [str(loc) for loc in loc_list if loc] if isinstance(loc_list, list) else value.split(',')
+        
+        # Strip every location and drop blanks in one pass; rows left empty become NaN
+        exploded = parts.explode().dropna().astype(str).str.strip()
+        exploded = exploded[exploded != '']
+        return exploded.groupby(level=0).agg(list).reindex(values.index)
+    
+    def remove_duplicate_products(self, df: pd.DataFrame, seen_product_ids: set) -> Tuple[pd.DataFrame, List[str]]:
+        """Drop rows whose product ID repeats within the chunk or an earlier chunk, keeping the first occurrence
+        
+        Returns the de-duplicated chunk and the duplicated product IDs.
+        """
+        product_ids = df['product_id']
+        # Probe the run-wide set once per row; isin() would rebuild a hash table
+        # from the whole set for every chunk
+        duplicate_mask = product_ids.duplicated(keep='first') | product_ids.map(seen_product_ids.__contains__)
+        if not duplicate_mask.any():
+            return df, []
+        
+        duplicates = product_ids[duplicate_mask].unique().tolist()
+        logger.warning("Found duplicate product IDs: %s", set(duplicates))
+        return df[~duplicate_mask], duplicates
+    
+    def insert_batch(self, valid_data: List[Tuple]) -> Optional[int]:
+        """Insert batch of validated data inside its own savepoint
+        
+        Rows whose product_id already exists in catalogue are skipped by the insert
+        itself. A failing batch rolls back only its own rows; committing is left to
+        commit_pending. Returns the number of rows inserted, or None if the batch failed.
+        """
+        cursor = self.insert_cursor
         try:
-            # If value is already a list, return it
-            if isinstance(value, list):
-                return [str(loc).strip() for loc in value if loc and str(loc).strip()]
-            
-            # If value is a string, try to parse as JSON array first
-            if isinstance(value, str):
-                value = value.strip()
-                # Remove curly braces if present
-                value = value.strip('{}')
-                
-                if value.startswith('[') and value.endswith(']'):
-                    try:
-                        loc_list = json.loads(value)
-                        if isinstance(loc_list, list):
-                            return [str(loc).strip() for loc in loc_list if loc and str(loc).strip()]
-                    except json.JSONDecodeError:
-                        pass
-                
-                # If not JSON, treat as single location or comma-separated locations
-                if ',' in value:
-                    return [loc.strip() for loc in value.split(',') if loc.strip()]
-                else:
-                    return [value.strip()] if value.strip() else None
+            cursor.execute("SAVEPOINT catalogue_batch")
+            try:
+                self._copy_batch(valid_data)
+
+                # Move staged rows into catalogue together with their metadata; the merge
+                # is prepared, so it is parsed and planned once per connection
+                cursor.execute(STAGE_INSERT_SQL, prepare=True)
+                inserted = cursor.rowcount
+                cursor.execute(f"TRUNCATE {STAGE_TABLE}")
+            except Exception:
+                # Undo only this batch; earlier uncommitted batches are kept
+                cursor.execute("ROLLBACK TO SAVEPOINT catalogue_batch")
+                logger.info("Batch rolled back to savepoint")
+                raise
+            cursor.execute("RELEASE SAVEPOINT catalogue_batch")
             
-            # For other types, convert to string and return as single-item array
-            return [str(value).strip()] if str(value).strip() else None
+            logger.info("Successfully inserted %s records", inserted)
+            return inserted
             
         except Exception as e:
-            errors.append(f"Invalid location format: {str(e)}")
+            # Batch failures are expected and counted; no stack walk per batch
+            logger.error("Error during batch insert: %s: %s", type(e).__name__, e)
             return None
     
-    def check_duplicate_products(self, df: pd.DataFrame) -> List[str]:
-        """Check for duplicate product IDs in the dataset"""
-        duplicates = df[df.duplicated(subset=['product_id'], keep=False)]['product_id'].tolist()
-        if duplicates:
-            logger.warning(f"Found duplicate product IDs: {set(duplicates)}")
-        return duplicates
+    def _copy_batch(self, rows: List[Tuple]):
+        """Stream a batch into the staging table in a single COPY round-trip
+        
+        Text format lets Postgres cast the values whatever their Python type, and
+        psycopg writes None as \\N.
+        """
+        with self.insert_cursor.copy(STAGE_COPY_SQL) as copy:
+            for row in rows:
+                copy.write_row(row)
     
-    def check_existing_products(self, product_ids: List[str]) -> List[str]:
-        """Check which product IDs already exist in the catalogue table"""
+    def commit_pending(self, results: Dict[str, Any], pending_inserts: int):
+        """Commit the batches inserted since the last commit
+        
+        If the commit fails their rows are lost, so they are taken back out of the
+        successful insert count.
+        """
         try:
-            cursor = self.connection.cursor()
-            placeholders = ','.join(['%s'] * len(product_ids))
-            query = f"SELECT product_id FROM catalogue WHERE product_id IN ({placeholders})"
-            cursor.execute(query, product_ids)
-            existing = [row[0] for row in cursor.fetchall()]
-            cursor.close()
-            
-            if existing:
-                logger.warning(f"Found {len(existing)} existing product IDs in catalogue table")
-            
-            return existing
-            
+            self.connection.commit()
+            logger.info("Committed transaction (%s new records)", pending_inserts)
         except Exception as e:
-            logger.error(f"Error checking existing products: {e}")
-            return []
+            logger.error("Failed to commit transaction: %s", e)
+            results['successful_inserts'] -= pending_inserts
+            results['errors'].append(f"Failed to commit {pending_inserts} inserted records")
+            try:
+                self.connection.rollback()
+            except Exception:
+                pass
     
-    def insert_batch(self, valid_data: List[Dict[str, Any]]) -> bool:
-        """Insert batch of validated data using transaction"""
-        try:
-            with self.connection.cursor() as cursor:
-                # Prepare the insert statement
-                columns = list(valid_data[0].keys())
-                placeholders = ','.join(['%s'] * len(columns))
-                insert_query = f"""
-                    INSERT INTO catalogue ({','.join(columns)}) 
-                    VALUES ({placeholders})
-                """
-
-                # Prepare data for batch insert
-                batch_data = []
-                for row_data in valid_data:
-                    row_values = [row_data.get(col) for col in columns]
-                    batch_data.append(row_values)
-
-                # Execute batch insert
-                cursor.executemany(insert_query, batch_data)
-
-                # Commit transaction
-                self.connection.commit()
-            
-            logger.info(f"Successfully inserted {len(valid_data)} records")
-            return True
+    def _iter_batches(self, df_iter: Iterator[pd.DataFrame], batch_size: int, results: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+        """Yield de-duplicated batches of CSV rows, updating row and duplicate counts as chunks are read"""
+        # Product IDs already processed in earlier chunks
+        seen_product_ids = set()
+        
+        for df in df_iter:
+            # Normalise identifiers once per chunk, before sharding, so whitespace
+            # variants of an ID hash to the same shard
+            df['product_id'] = df['product_id'].str.strip()
+            df['item_code'] = df['item_code'].str.strip()
             
-        except Exception as e:
-            logger.error(f"Error during batch insert: {e}")
-            logger.error(traceback.format_exc())
+            # Keep only this shard's rows; the hash is stable across processes,
+            # unlike Python's salted hash()
+            if self.shard_count > 1:
+                shard_ids = pd.util.hash_pandas_object(df['product_id'], index=False) % self.shard_count
+                df = df[(shard_ids == self.shard_index).to_numpy()]
             
-            # Rollback transaction
-            if self.connection:
-                self.connection.rollback()
-                logger.info("Transaction rolled back")
+            results['total_rows'] += len(df)
+            logger.info("Read CSV chunk of %s rows (total so far: %s)", len(df), results['total_rows'])
             
-            return False
+            # Remove duplicates in CSV, keeping first occurrence
+            rows_before = len(df)
+            df, duplicates = self.remove_duplicate_products(df, seen_product_ids)
+            if duplicates:
+                removed = rows_before - len(df)
+                results['duplicate_failures'] += removed
+                results['errors'].append(f"Found duplicate product IDs in CSV: {set(duplicates)}")
+                logger.info("Removed %s duplicate rows from CSV", removed)
+            seen_product_ids.update(df['product_id'])
+            
+            # Process chunk in batches for efficient data fetching
+            for chunk_start in range(0, len(df), batch_size):
+                yield df.iloc[chunk_start:chunk_start + batch_size]
     
-    def collate_and_migrate(self, csv_file_path: str, batch_size: int = 50) -> Dict[str, Any]:
+    def _fetch_batch_data(self, df_chunk: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, Dict], Dict[str, Dict]]:
+        """Drop products already in catalogue and fetch metadata and pricing for the rest
+        
+        Runs on the prefetch thread; returns the remaining rows with their lookups.
+        """
+        existing = self.get_existing_products_batch(df_chunk['product_id'].dropna().tolist())
+        if existing:
+            df_chunk = df_chunk[~df_chunk['product_id'].isin(existing)]
+        
+        # Extract product IDs and item codes for data fetching
+        product_ids_chunk = df_chunk['product_id'].astype(str).tolist()
+        item_codes_chunk = df_chunk['item_code'].astype(str).tolist()
+        return (df_chunk,) + self.get_collated_batch(product_ids_chunk, item_codes_chunk)
+    
+    def collate_and_migrate(self, csv_file_path: str, batch_size: int = 10_000) -> Dict[str, Any]:
         """Main collation and migration function"""
         logger.info("=== Starting Data Collation and Migration ===")
         
@@ -565,128 +994,326 @@ class DataCollator:
             'errors': []
         }
         
+        # Rows staged and inserted since the last commit
+        pending_rows = 0
+        pending_inserts = 0
+        # Indexes dropped for the load
+        dropped_indexes = []
+        
         try:
-            # Load CSV
-            df = self.load_csv(csv_file_path)
-            if df is None:
+            # Open CSV as a chunk iterator, reading whole batches per chunk so no
+            # short batch is left over at the end of each chunk
+            df_iter = self.load_csv(csv_file_path, chunksize=max(CSV_CHUNK_SIZE // batch_size, 1) * batch_size)
+            if df_iter is None:
                 results['errors'].append("Failed to load CSV file")
                 return results
             
-            results['total_rows'] = len(df)
-            
             # Connect to database
             if not self.connect_db():
                 results['errors'].append("Failed to connect to database")
                 return results
             
-            # Check for duplicates in CSV
-            duplicates = self.check_duplicate_products(df)
-            if duplicates:
-                results['duplicate_failures'] = len(duplicates)
-                results['errors'].append(f"Found duplicate product IDs in CSV: {set(duplicates)}")
-                # Remove duplicates, keeping first occurrence
-                df = df.drop_duplicates(subset=['product_id'], keep='first')
-                logger.info(f"Removed {len(duplicates)} duplicate rows from CSV")
-            
-            # Check for existing products in catalogue table
-            product_ids = df['product_id'].tolist()
-            existing = self.check_existing_products(product_ids)
-            if existing:
-                results['existing_products'] = len(existing)
-                logger.info(f"Skipping {len(existing)} existing products")
-                df = df[~df['product_id'].isin(existing)]
+            if self.rebuild_indexes:
+                dropped_indexes = drop_secondary_indexes(self.db_config)
             
             # Process data in batches
-            valid_data = []
             batch_count = 0
+            batches = self._iter_batches(df_iter, batch_size, results)
             
-            # Process dataframe in chunks for efficient data fetching
-            for chunk_start in range(0, len(df), batch_size):
-                chunk_end = min(chunk_start + batch_size, len(df))
-                df_chunk = df.iloc[chunk_start:chunk_end]
-                
-                # Extract product IDs and item codes for data fetching
-                product_ids_chunk = df_chunk['product_id'].astype(str).str.strip().tolist()
-                item_codes_chunk = df_chunk['item_code'].astype(str).str.strip().tolist()
-                item_codes_chunk = [code for code in item_codes_chunk if code and code != 'nan']
-                
-                # Fetch metadata and pricing data for this batch
-                logger.info(f"Fetching data for batch {batch_count + 1} ({len(product_ids_chunk)} products)")
-                metadata = self.get_metadata_batch(product_ids_chunk)
-                price_details = self.get_price_details_batch(item_codes_chunk)
+            # Double-buffer the lookups: while batch N is validated and inserted on the
+            # main connection, the metadata and pricing for batch N+1 are fetched
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch') as prefetcher:
+                next_chunk = next(batches, None)
+                pending = prefetcher.submit(self._fetch_batch_data, next_chunk) if next_chunk is not None else None
                 
-                # Process each row in the batch
-                for index, row in df_chunk.iterrows():
-                    is_valid, row_result = self.validate_and_collate_row(row, index, metadata, price_details)
+                while next_chunk is not None:
+                    logger.info("Fetching data for batch %s (%s products)", batch_count + 1, len(next_chunk))
+                    df_chunk, metadata, price_details = pending.result()
+                    results['existing_products'] += len(next_chunk) - len(df_chunk)
                     
-                    if is_valid:
-                        valid_data.append(row_result)
-                    else:
-                        results['validation_failures'] += 1
-                        self.validation_errors.append({
-                            'row_index': index,
-                            'product_id': row.get('product_id', 'Unknown'),
-                            'errors': row_result.get('errors', [])
-                        })
-                
-                # Insert batch when batch_size is reached
-                if valid_data:
-                    if self.insert_batch(valid_data):
-                        results['successful_inserts'] += len(valid_data)
-                        batch_count += 1
-                        logger.info(f"Completed batch {batch_count} ({len(valid_data)} records)")
-                    else:
-                        results['errors'].append(f"Failed to insert batch {batch_count + 1}")
+                    next_chunk = next(batches, None)
+                    if next_chunk is not None:
+                        pending = prefetcher.submit(self._fetch_batch_data, next_chunk)
+                    
+                    # Validate and collate the whole batch at once
+                    valid_data, failures = self.validate_and_collate_batch(df_chunk, metadata, price_details)
+                    results['validation_failures'] += len(failures)
+                    self.validation_errors.extend(failures)
+                    
+                    # Insert batch when batch_size is reached
+                    if valid_data:
+                        inserted = self.insert_batch(valid_data)
+                        if inserted is not None:
+                            existing = len(valid_data) - inserted
+                            results['successful_inserts'] += inserted
+                            results['existing_products'] += existing
+                            pending_rows += len(valid_data)
+                            pending_inserts += inserted
+                            batch_count += 1
+                            logger.info("Completed batch %s (%s records, %s existing products skipped)", batch_count, inserted, existing)
+                        else:
+                            results['errors'].append(f"Failed to insert batch {batch_count + 1}")
                     
-                    valid_data = []  # Reset batch
+                    # Commit once enough rows have accumulated, rather than after every batch
+                    if pending_rows >= self.commit_every:
+                        self.commit_pending(results, pending_inserts)
+                        pending_rows = pending_inserts = 0
+            
+            # Commit whatever is left after the last batch
+            if pending_rows:
+                self.commit_pending(results, pending_inserts)
+                pending_rows = pending_inserts = 0
             
             # Generate validation error report
             if self.validation_errors:
                 self._generate_error_report()
             
-            # Stop error logger and write any remaining errors
-            self.error_logger.stop()
-            
             logger.info("=== Collation and Migration Completed ===")
-            logger.info(f"Total rows processed: {results['total_rows']}")
-            logger.info(f"Successful inserts: {results['successful_inserts']}")
-            logger.info(f"Validation failures: {results['validation_failures']}")
-            logger.info(f"Duplicate failures: {results['duplicate_failures']}")
-            logger.info(f"Existing products skipped: {results['existing_products']}")
-            logger.info(f"Products skipped (no metadata): {self.skipped_no_metadata}")
-            logger.info(f"Products skipped (no pricing): {self.skipped_no_pricing}")
+            logger.info("Total rows processed: %s", results['total_rows'])
+            logger.info("Successful inserts: %s", results['successful_inserts'])
+            logger.info("Validation failures: %s", results['validation_failures'])
+            logger.info("Duplicate failures: %s", results['duplicate_failures'])
+            logger.info("Existing products skipped: %s", results['existing_products'])
+            logger.info("Products skipped (no metadata): %s", self.skipped_no_metadata)
+            logger.info("Products skipped (no pricing): %s", self.skipped_no_pricing)
             
             return results
             
         except Exception as e:
             error_msg = f"Critical error during collation and migration: {str(e)}"
-            logger.error(error_msg)
-            logger.error(traceback.format_exc())
+            logger.exception(error_msg)
             results['errors'].append(error_msg)
+            # Uncommitted batches are rolled back when the connection closes
+            results['successful_inserts'] -= pending_inserts
             return results
             
         finally:
-            self.disconnect_db()
+            # Each cleanup step runs even if an earlier one raises, so dropped
+            # indexes are always rebuilt
+            try:
+                try:
+                    # Stop error logger and write any remaining errors, so the skipped
+                    # rows file is complete even when the run fails
+                    self.error_logger.stop()
+                finally:
+                    # Closing the connections ends any open transaction, which a
+                    # concurrent index build would otherwise wait on
+                    self.disconnect_db()
+            finally:
+                if dropped_indexes:
+                    recreate_indexes(self.db_config, dropped_indexes)
     
     def _generate_error_report(self):
         """Generate detailed error report for validation failures"""
         try:
-            with open('collation_validation_errors.log', 'w') as f:
-                f.write("COLLATION VALIDATION ERROR REPORT\n")
-                f.write("=" * 50 + "\n\n")
-                
-                for error in self.validation_errors:
-                    f.write(f"Row Index: {error['row_index']}\n")
-                    f.write(f"Product ID: {error['product_id']}\n")
-                    f.write("Errors:\n")
-                    for err in error['errors']:
-                        f.write(f"  - {err}\n")
-                    f.write("\n" + "-" * 30 + "\n\n")
+            # Build the whole report first and write it in one call
+            parts = [VALIDATION_REPORT_HEADER]
+            separator = "\n" + "-" * 30 + "\n\n"
+            for row_index, product_id, errors in self.validation_errors:
+                parts.append(f"Row Index: {row_index}\nProduct ID: {product_id}\nErrors:\n")
+                parts.extend(f"  - {err}\n" for err in errors)
+                parts.append(separator)
+            
+            with open(self.validation_report_file, 'w') as f:
+                f.write(''.join(parts))
+            
+            logger.info("Collation validation error report saved to '%s'", self.validation_report_file)
+            
+        except Exception as e:
+            logger.error("Failed to generate error report: %s", e)
+
+
+def _concurrent_index_ddl(definition: str) -> str:
+    """Turn a pg_get_indexdef definition into a CREATE INDEX CONCURRENTLY statement"""
+    return definition.replace('CREATE INDEX ', 'CREATE INDEX CONCURRENTLY ', 1)
+
+
+def drop_secondary_indexes(db_config: DBConfig) -> List[Tuple[str, str, str]]:
+    """Drop catalogue's secondary indexes ahead of a bulk load
+    
+    Unique indexes and indexes backing constraints (the primary key that
+    ON CONFLICT relies on) are kept. The definitions are written to
+    INDEX_DDL_FILE before anything is dropped, so the indexes can be recreated
+    by hand if the process dies mid-load. Nothing is dropped while that file
+    is left over from an earlier run. Returns (schema, name, definition) for
+    each dropped index.
+    """
+    query = """
+    SELECT n.nspname, i.relname, pg_get_indexdef(x.indexrelid)
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    JOIN pg_namespace n ON n.oid = i.relnamespace
+    WHERE x.indrelid = 'catalogue'::regclass
+      AND NOT x.indisunique
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = x.indexrelid)
+    """
+    
+    dropped = []
+    # Overwriting the file would lose the only record of indexes still missing
+    if os.path.exists(INDEX_DDL_FILE):
+        logger.error("'%s' holds indexes left missing by an earlier run; recreate them "
+                     "and remove the file before rebuilding indexes again. Loading with "
+                     "catalogue's indexes in place", INDEX_DDL_FILE)
+        return dropped
+    
+    try:
+        # CONCURRENTLY cannot run inside a transaction block
+        with psycopg.connect(**db_config.connect_kwargs(), autocommit=True) as conn:
+            indexes = conn.execute(query).fetchall()
+            if not indexes:
+                return dropped
             
-            logger.info(f"Collation validation error report saved to 'collation_validation_errors.log'")
+            with open(INDEX_DDL_FILE, 'w') as f:
+                f.write(''.join(f"{_concurrent_index_ddl(definition)};\n" for _, _, definition in indexes))
+            logger.info("Saved %s catalogue index definitions to '%s'", len(indexes), INDEX_DDL_FILE)
             
+            for schema, name, definition in indexes:
+                logger.info("Dropping index %s for the load: %s", name, definition)
+                conn.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}.{}").format(sql.Identifier(schema), sql.Identifier(name)))
+                dropped.append((schema, name, definition))
+    except Exception as e:
+        logger.error("Failed to drop catalogue indexes: %s", e)
+    return dropped
+
+
+def recreate_indexes(db_config: DBConfig, indexes: List[Tuple[str, str, str]]):
+    """Recreate indexes dropped by drop_secondary_indexes without blocking writes
+    
+    A failed concurrent build leaves an INVALID index under the same name, which
+    is dropped again so the saved statement can simply be re-run.
+    """
+    failed = []
+    try:
+        with psycopg.connect(**db_config.connect_kwargs(), autocommit=True) as conn:
+            conn.execute("SET statement_timeout = 0")
+            conn.execute(sql.SQL("SET maintenance_work_mem = {}").format(sql.Literal(INDEX_BUILD_MAINTENANCE_WORK_MEM)))
+            for schema, name, definition in indexes:
+                try:
+                    conn.execute(_concurrent_index_ddl(definition))
+                    logger.info("Recreated index: %s", definition)
+                except Exception as e:
+                    failed.append(definition)
+                    logger.error("Failed to recreate index %s: %s", name, e)
+                    try:
+                        conn.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}.{}").format(sql.Identifier(schema), sql.Identifier(name)))
+                    except Exception as drop_error:
+                        logger.error("Failed to drop invalid index %s, drop it before re-running its definition: %s", name, drop_error)
+    except Exception as e:
+        failed = [definition for _, _, definition in indexes]
+        logger.error("Failed to recreate catalogue indexes: %s", e)
+    
+    if not failed:
+        os.remove(INDEX_DDL_FILE)
+        return
+    # Leave only the statements still to be run in the saved file
+    try:
+        with open(INDEX_DDL_FILE, 'w') as f:
+            f.write(''.join(f"{_concurrent_index_ddl(definition)};\n" for definition in failed))
+    except Exception as e:
+        logger.error("Failed to update '%s': %s", INDEX_DDL_FILE, e)
+    logger.error("%s catalogue indexes are missing; recreate them from '%s'", len(failed), INDEX_DDL_FILE)
+
+
+def run_shard(db_config: DBConfig, erp_db_config: DBConfig, csv_file_path: str, batch_size: int,
+              shard: Tuple[int, int], collator_kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Collate and migrate one shard of the CSV with its own collator and connections
+    
+    Runs in a worker process, so only picklable results are returned.
+    """
+    collator = DataCollator(db_config, erp_db_config, shard=shard, **collator_kwargs)
+    results = collator.collate_and_migrate(csv_file_path, batch_size=batch_size)
+    results['skipped_no_metadata'] = collator.skipped_no_metadata
+    results['skipped_no_pricing'] = collator.skipped_no_pricing
+    results['validation_report_file'] = collator.validation_report_file if collator.validation_errors else None
+    results['skipped_rows_file'] = collator.error_logger.error_file
+    return results
+
+
+def collate_and_migrate_parallel(db_config: DBConfig, erp_db_config: DBConfig, csv_file_path: str,
+                                 workers: int, batch_size: int = 10_000, **collator_kwargs) -> Dict[str, Any]:
+    """Run one worker process per shard of the CSV and merge their results
+    
+    Rows are sharded by their stripped product_id, the same form duplicates are
+    detected on, so CSV duplicates (whitespace variants included) always meet in
+    the same worker and are counted as duplicates there. ON CONFLICT (product_id)
+    DO NOTHING keeps concurrent inserts into catalogue from colliding.
+    The per-shard validation reports are concatenated into
+    VALIDATION_REPORT_FILE; skipped rows stay in one file per shard. With
+    rebuild_indexes, catalogue's secondary indexes are dropped once before the
+    workers start and recreated once they have all finished.
+    """
+    rebuild_indexes = collator_kwargs.pop('rebuild_indexes', False)
+    merged = {
+        'total_rows': 0,
+        'successful_inserts': 0,
+        'validation_failures': 0,
+        'duplicate_failures': 0,
+        'existing_products': 0,
+        'skipped_no_metadata': 0,
+        'skipped_no_pricing': 0,
+        'errors': [],
+        'validation_report_file': None,
+        'skipped_rows_files': []
+    }
+    
+    dropped_indexes = drop_secondary_indexes(db_config) if rebuild_indexes else []
+    
+    logger.info("Starting %s collation workers", workers)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(run_shard, db_config, erp_db_config, csv_file_path, batch_size, (index, workers), collator_kwargs)
+                for index in range(workers)
+            ]
+            shard_results = []
+            for index, future in enumerate(futures):
+                try:
+                    shard_results.append(future.result())
+                except Exception as e:
+                    logger.error("Shard %s/%s failed: %s", index, workers, e)
+                    merged['errors'].append(f"Shard {index}/{workers} failed: {e}")
+    finally:
+        if dropped_indexes:
+            recreate_indexes(db_config, dropped_indexes)
+    
+    report_files = []
+    for shard in shard_results:
+        for key in ('total_rows', 'successful_inserts', 'validation_failures', 'duplicate_failures',
+                    'existing_products', 'skipped_no_metadata', 'skipped_no_pricing'):
+            merged[key] += shard[key]
+        merged['errors'].extend(shard['errors'])
+        merged['skipped_rows_files'].append(shard['skipped_rows_file'])
+        if shard['validation_report_file']:
+            report_files.append(shard['validation_report_file'])
+    
+    # Concatenate the shard reports under a single header
+    if report_files:
+        try:
+            with open(VALIDATION_REPORT_FILE, 'w') as out:
+                out.write(VALIDATION_REPORT_HEADER)
+                for report_file in report_files:
+                    with open(report_file) as f:
+                        content = f.read()
+                    out.write(content[len(VALIDATION_REPORT_HEADER):] if content.startswith(VALIDATION_REPORT_HEADER) else content)
+                    os.remove(report_file)
+            merged['validation_report_file'] = VALIDATION_REPORT_FILE
+            logger.info("Merged %s shard validation reports into '%s'", len(report_files), VALIDATION_REPORT_FILE)
         except Exception as e:
-            logger.error(f"Failed to generate error report: {e}")
+            logger.error("Failed to merge validation reports: %s", e)
+            merged['validation_report_file'] = ', '.join(report_files)
+    
+    return merged
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse a --shard argument of the form i/N"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected i/N")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"Invalid shard '{value}', expected 0 <= i < N")
+    return index, count
 
 
 def main():
@@ -694,61 +1321,69 @@ def main():
     
     parser = argparse.ArgumentParser(description="Collate data and migrate to catalogue table")
     parser.add_argument('--csv', dest='csv_path', default='single_product_test.csv', help='Path to CSV file with item_code and product_id')
-    parser.add_argument('--batch-size', dest='batch_size', type=int, default=50, help='Batch size for processing')
+    parser.add_argument('--batch-size', dest='batch_size', type=int, default=10_000, help='Batch size for processing')
+    parser.add_argument('--commit-every', dest='commit_every', type=int, default=10_000, help='Number of staged rows per transaction commit')
+    parser.add_argument('--async-commit', dest='async_commit', action='store_true', help='Disable synchronous_commit for the loading session (only if the load can be re-run)')
+    parser.add_argument('--shard', dest='shard', type=parse_shard, default=(0, 1), help='Process only shard i of N (format i/N) so N workers can load the CSV in parallel')
+    parser.add_argument('--rebuild-indexes', dest='rebuild_indexes', action='store_true', help="Drop catalogue's secondary indexes for the load and recreate them afterwards; queries run without them meanwhile")
+    parser.add_argument('--workers', dest='workers', type=int, default=1, help='Number of worker processes, each loading one shard of the CSV over its own connections (e.g. the CPU count)')
+    parser.add_argument('--erp-fdw-schema', dest='erp_fdw_schema', default=None, help='Schema on the main database exposing distributor_master_list via postgres_fdw; enables single-JOIN lookups')
     args = parser.parse_args()
 
     # Database configuration for defaultdb (catalogue and original_all_products tables)
-    DB_CONFIG = {
-        'host': '127.0.0.1',
-        'port': '5433',
-        'database': 'defaultdb',
-        'user': 'postgres',
-        'password': "Dolo1729!#$",
-        'sslmode': 'verify-ca',
-        'sslrootcert': '/Users/shashidharmittapalli/Downloads/rds-ca.pem'
-    }
+    DB_CONFIG = DBConfig.from_env('DB_', 'defaultdb', 'SSL_CERT_PATH')
     
     # ERP Database configuration for plazza_erp (distributor_master_list table)
-    ERP_DB_CONFIG = {
-        'host': '127.0.0.1',
-        'port': '5433',
-        'database': 'plazza_erp',
-        'user': 'postgres',
-        'password': "Dolo1729!#$",
-        'sslmode': 'verify-ca',
-        'sslrootcert': '/Users/shashidharmittapalli/Downloads/rds-ca.pem'
-    }
+    ERP_DB_CONFIG = DBConfig.from_env('ERP_DB_', 'plazza_erp', 'ERP_SSL_CERT_PATH')
     
     # CSV file path
     CSV_FILE = args.csv_path
     
-    # Create collator instance
-    collator = DataCollator(DB_CONFIG, ERP_DB_CONFIG)
+    collator_kwargs = {
+        'erp_fdw_schema': args.erp_fdw_schema,
+        'commit_every': args.commit_every,
+        'synchronous_commit': not args.async_commit,
+        'rebuild_indexes': args.rebuild_indexes
+    }
     
-    # Run collation and migration
-    results = collator.collate_and_migrate(CSV_FILE, batch_size=args.batch_size)
+    # Run collation and migration, across worker processes when requested
+    if args.workers > 1:
+        results = collate_and_migrate_parallel(
+            DB_CONFIG, ERP_DB_CONFIG, CSV_FILE, args.workers,
+            batch_size=args.batch_size, **collator_kwargs
+        )
+    else:
+        collator = DataCollator(DB_CONFIG, ERP_DB_CONFIG, shard=args.shard, **collator_kwargs)
+        results = collator.collate_and_migrate(CSV_FILE, batch_size=args.batch_size)
+        results['skipped_no_metadata'] = collator.skipped_no_metadata
+        results['skipped_no_pricing'] = collator.skipped_no_pricing
+        results['validation_report_file'] = collator.validation_report_file if collator.validation_errors else None
+        results['skipped_rows_files'] = [collator.error_logger.error_file]
     
-    # Print final summary
-    print("\n" + "=" * 60)
-    print("COLLATION AND MIGRATION SUMMARY")
-    print("=" * 60)
-    print(f"Total rows in CSV: {results['total_rows']}")
-    print(f"Successfully inserted: {results['successful_inserts']}")
-    print(f"Validation failures: {results['validation_failures']}")
-    print(f"Duplicate products: {results['duplicate_failures']}")
-    print(f"Existing products skipped: {results['existing_products']}")
-    print(f"Products skipped (no metadata): {collator.skipped_no_metadata}")
-    print(f"Products skipped (no pricing): {collator.skipped_no_pricing}")
+    # Print final summary in a single write
+    lines = [
+        "",
+        "=" * 60,
+        "COLLATION AND MIGRATION SUMMARY",
+        "=" * 60,
+        f"Total rows in CSV: {results['total_rows']}",
+        f"Successfully inserted: {results['successful_inserts']}",
+        f"Validation failures: {results['validation_failures']}",
+        f"Duplicate products: {results['duplicate_failures']}",
+        f"Existing products skipped: {results['existing_products']}",
+        f"Products skipped (no metadata): {results['skipped_no_metadata']}",
+        f"Products skipped (no pricing): {results['skipped_no_pricing']}"
+    ]
     
     if results['errors']:
-        print("\nCritical Errors:")
-        for error in results['errors']:
-            print(f"  - {error}")
-    
-    print("\nCheck 'collation_migration.log' for detailed logs")
-    if collator.validation_errors:
-        print("Check 'collation_validation_errors.log' for validation error details")
-    print(f"Check '{collator.error_logger.error_file}' for skipped products details")
+        lines.append("\nCritical Errors:")
+        lines.extend(f"  - {error}" for error in results['errors'])
+    
+    lines.append("\nCheck 'collation_migration.log' for detailed logs")
+    if results['validation_report_file']:
+        lines.append(f"Check '{results['validation_report_file']}' for validation error details")
+    lines.append(f"Check '{', '.join(results['skipped_rows_files'])}' for skipped products details")
+    sys.stdout.write('\n'.join(lines) + '\n')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,10 @@
+-- Expression indexes backing the case-insensitive item code lookups in
+-- collate_and_migrate_data.py (get_price_details_batch).
+-- Run against the ERP database (plazza_erp). CONCURRENTLY cannot run inside
+-- a transaction block, so execute with psql's default autocommit.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_dml_lower_item_code
+    ON distributor_master_list (LOWER(item_code));
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_dml_lower_original_item_code
+    ON distributor_master_list (LOWER(original_item_code));